@@ -14,6 +14,8 @@ VISIR SAM
 
 # Standard Imports
 from __future__ import print_function
+import copy
+from collections import namedtuple
 import numpy as np
 from astropy.io import fits
 import os, sys, time
@@ -25,6 +27,75 @@ from .misctools import utils
 
 um = 1.0e-6
 
+# NIRISS filter table, built once at import time so every NIRISS
+# construction shares the same instances instead of rebuilding dicts per
+# call.  One immutable record per filter replaces four parallel dicts -
+# a single hash lookup in __init__ fetches all the constants together.
+FilterSpec = namedtuple("FilterSpec", "lam_c lam_w lam_bin cvsupport")
+# about 12 wavs in f430m lam_bin = {"F277W": 50, "F380M": 20, "F430M":40, "F480M":30}
+NIRISS_FILTERS = {
+    "F277W": FilterSpec(lam_c=2.77e-6, lam_w=0.2, lam_bin=50, cvsupport=0.02),
+    "F380M": FilterSpec(lam_c=3.8e-6, lam_w=0.1, lam_bin=20, cvsupport=0.02),
+    "F430M": FilterSpec(lam_c=4.28521033106325E-06, lam_w=0.0436, lam_bin=150,
+                        cvsupport=0.02),
+    "F480M": FilterSpec(lam_c=4.8e-6, lam_w=0.08, lam_bin=30, cvsupport=0.02),
+    }
+# legacy per-quantity views of the same table
+NIRISS_LAM_C = dict((f, s.lam_c) for f, s in NIRISS_FILTERS.items())
+NIRISS_LAM_W = dict((f, s.lam_w) for f, s in NIRISS_FILTERS.items())
+NIRISS_LAM_BIN = dict((f, s.lam_bin) for f, s in NIRISS_FILTERS.items())
+
+# Mask geometries are fixed per (maskname, chooseholes), but their
+# construction reads geometry from disk.  Build each once and hand out deep
+# copies, since several InstrumentData classes mutate mask.ctrs afterwards.
+_MASK_CACHE = {}
+
+def get_nrm_mask(maskname, chooseholes=None):
+    """ Cached NRM_mask_definitions construction - returns a deep copy """
+    key = (maskname, tuple(chooseholes) if chooseholes else None)
+    if key not in _MASK_CACHE:
+        _MASK_CACHE[key] = NRM_mask_definitions(maskname=maskname,
+                                                chooseholes=chooseholes)
+    return copy.deepcopy(_MASK_CACHE[key])
+
+
+# In-process + on-disk memoization of the NIRISS filter throughput, so
+# repeated constructions (and repeated script invocations) skip the
+# webbpsf filter-curve load & rebinning after the first time.
+_NIRISS_THROUGHPUT_CACHE = {}
+
+def niriss_throughput(filt, lam_c=NIRISS_LAM_C, lam_w=NIRISS_LAM_W,
+                      lam_bin=NIRISS_LAM_BIN):
+    """ Return the [weight, wavelength/m] throughput table for a NIRISS
+        filter, memoized in-process and persisted to ~/.cache/implaneia """
+    if filt in _NIRISS_THROUGHPUT_CACHE:
+        return _NIRISS_THROUGHPUT_CACHE[filt]
+
+    cachedir = os.path.join(os.path.expanduser("~"), ".cache", "implaneia")
+    cachefn = os.path.join(cachedir,
+                "throughput_{0}_bin{1}.npy".format(filt, lam_bin[filt]))
+    if os.path.exists(cachefn):
+        throughput = np.load(cachefn)
+    else:
+        try:
+            # If user has webbpsf installed, this will work
+            throughput = utils.trim_webbpsf_filter(filt, specbin=lam_bin[filt])
+        except:
+            # tophat stand-in: memoized in-process only, never written to
+            # disk, so installing webbpsf later gets the real curve on the
+            # next run instead of a cached tophat forever
+            throughput = utils.tophatfilter(lam_c[filt], lam_w[filt], npoints=11)
+        else:
+            try:
+                os.makedirs(cachedir, exist_ok=True)
+                np.save(cachefn, np.array(throughput))
+            except OSError:
+                pass  # unwritable cache dir - just skip persisting
+
+    _NIRISS_THROUGHPUT_CACHE[filt] = throughput
+    return throughput
+
+
 # utility routines for InstrumentData classes
 
 def show_cvsupport_threshold(instr):
@@ -68,7 +139,7 @@ class GPI:
         self.arrname = "gpi_g10s40"
         self.pscale_mas = 14.1667 #14.27 looks like a better match March 2019
         self.pscale_rad = utils.mas2rad(self.pscale_mas)
-        self.mask = NRM_mask_definitions(maskname=self.arrname)
+        self.mask = get_nrm_mask(self.arrname)
         self.mask.ctrs = np.array(self.mask.ctrs)
         # Hard code -1.5 deg rotation in data (April 2016)
         # (can be moved to NRM_mask_definitions later)
@@ -90,14 +161,20 @@ class GPI:
         if type(reffile)==str:
             reffile = [reffile,]
         for fn in reffile:
-            reffits = fits.open(fn)
-            self.hdr0.append(reffits[0].header)
-            self.hdr1.append(reffits[1].header)
-            self.refdata.append(reffits[1].data)
-            reffits.close()
+            # with-block: the handle (and any mmap) is released promptly
+            # even if a header/data access raises mid-loop
+            with fits.open(fn) as reffits:
+                self.hdr0.append(reffits[0].header)
+                self.hdr1.append(reffits[1].header)
+                self.refdata.append(reffits[1].data)
         # instrument settings
-        self.mode = self.hdr0[0]["DISPERSR"]
-        self.obsmode = self.hdr0[0]["OBSMODE"]
+        # fetch reference-header keywords through locals, each key once -
+        # astropy Header lookups case-fold and parse cards every time
+        ph = self.hdr0[0]
+        sh = self.hdr1[0]
+        naxis3 = sh["NAXIS3"]
+        self.mode = ph["DISPERSR"]
+        self.obsmode = ph["OBSMODE"]
         self.band = self.obsmode[-1] # K1 is two letters
         self.ref_imgs_dir = "refimgs_"+self.band+"/"
 
@@ -111,7 +188,7 @@ class GPI:
 
 
         # Special mode for collapsed data
-        if self.hdr1[0]["NAXIS3"]==1:
+        if naxis3==1:
             # This is just a way handle data that is manually collapsed.
             # Not a standard data format for GPI.
             print("No NAXIS3 keyword. This is probably collapsed data.")
@@ -121,10 +198,10 @@ class GPI:
         # wavelength info: spect mode or pol more
         if "PRISM" in self.mode:
             # GPI's spectral mode
-            self.nwav = self.hdr1[0]["NAXIS3"]
-            self.wls = np.linspace(self.hdr1[0]["CRVAL3"], \
-                                   self.hdr1[0]["CRVAL3"]+\
-                                   self.hdr1[0]['CD3_3']*self.nwav,\
+            self.nwav = naxis3
+            crval3 = sh["CRVAL3"]
+            self.wls = np.linspace(crval3, \
+                                   crval3 + sh['CD3_3']*self.nwav,\
                                    self.nwav)*um
             self.eff_band = um*np.ones(self.nwav)*(self.wls[-1] - \
                                        self.wls[0])/self.nwav
@@ -166,8 +243,10 @@ class GPI:
                     filterfile = kwargs["gpifilterpath"]+"GPI-filter-K2.fits"
                     print(kwargs["gpifilterpath"]+"GPI-filter-K2.fits")
                     cutoff=0.94               
-                # Read in gpi filter file
-                fitsfilter = fits.open(filterfile)[1].data
+                # Read in gpi filter file - the old one-liner leaked the
+                # open file handle for the life of the process
+                with fits.open(filterfile) as ffilt:
+                    fitsfilter = ffilt[1].data
                 wavls = []
                 wghts = []
                 # Sample the filter file so the filter is only 50 elements long
@@ -199,11 +278,11 @@ class GPI:
 
         # Observation info
         self.telname= "GEMINI"
-        self.ra, self.dec = self.hdr0[0]["RA"], self.hdr0[0]["DEC"]
+        self.ra, self.dec = ph["RA"], ph["DEC"]
         try:
-            self.date = self.hdr0[0]["DATE"]
+            self.date = ph["DATE"]
         except:
-            self.date = self.hdr0[0]["DATE-OBS"]
+            self.date = ph["DATE-OBS"]
         self.month = self.date[-5:-3]
         self.day = self.date[-2:]
         self.year = self.date[:4]
@@ -224,19 +303,15 @@ class GPI:
             self.avcassang = 0.0
         self.parang_range = abs(self.parangs[-1] - self.parangs[0])
         self.totalinttime = np.sum(self.itime)
-        try:
-            self.pa = self.hdr0[0]["PA"]
-        except:
-            self.pa = 0.0
-        try:
-            self.objname = self.hdr0[0]["OBJECT"]
-        except:
-            self.objname = "Unknown"
+        self.pa = ph["PA"] if "PA" in ph else 0.0
+        self.objname = ph["OBJECT"] if "OBJECT" in ph else "Unknown"
 
         # Look for additional keyword arguments ?
     def read_data(self, fn):
 
-        fitsfile = fits.open(fn)
+        # memmap: slices are demand-paged instead of the whole cube being
+        # read up front; the live mmap keeps pages reachable after close()
+        fitsfile = fits.open(fn, memmap=True)
         sci=fitsfile[1].data
         hdr=fitsfile[1].header
         fitsfile.close()
@@ -265,7 +340,7 @@ class VISIR:
         self.arrname = "visir_sam"
         self.pscale_mas = 45
         self.pscale_rad = utils.mas2rad(self.pscale_mas)
-        self.mask = NRM_mask_definitions(maskname=self.arrname)
+        self.mask = get_nrm_mask(self.arrname)
         self.mask.ctrs = np.array(self.mask.ctrs)
         #self.mask.ctrs[:,1]*=-1
         self.holeshape="hex"
@@ -309,50 +384,51 @@ class VISIR:
         #############################
         # Observation info - I don't know yet how JWST data headers will be structured
         self.telname= "VLT"
-        try:
-            self.ra, self.dec = self.hdr0["RA"], self.hdr0["DEC"]
-        except:
+        # same guarded lookups as NIRISS: no header exists at construction,
+        # so avoid raising an AttributeError per keyword
+        hdr0 = getattr(self, "hdr0", None)
+        hdr1 = getattr(self, "hdr1", None)
+        if hdr0 is not None and "RA" in hdr0:
+            self.ra, self.dec = hdr0["RA"], hdr0["DEC"]
+        else:
             self.ra, self.dec = 00, 00
-        try:
-            self.date = self.hdr0["DATE"]
+        if hdr0 is not None and "DATE" in hdr0:
+            self.date = hdr0["DATE"]
             self.month = self.date[-5:-3]
             self.day = self.date[-2:]
             self.year = self.date[:4]
-        except:
+        else:
             lt = time.localtime()
             self.date = "{0}{1:02d}{2:02d}".format(lt[0],lt[1],lt[2])
             self.month = lt[1]
             self.day = lt[2]
             self.year = lt[0]
-        try:
-            self.parang = self.hdr0["PAR_ANG"]
-        except:
-            self.parang = 00
-        try:
-            self.pa = self.hdr0["PA"]
-        except:
-            self.pa = 00
-        try:
-            self.itime = self.hdr1["ITIME"]
-        except:
-            self.itime = 00
+        self.parang = hdr0["PAR_ANG"] if hdr0 is not None and "PAR_ANG" in hdr0 else 00
+        self.pa = hdr0["PA"] if hdr0 is not None and "PA" in hdr0 else 00
+        self.itime = hdr1["ITIME"] if hdr1 is not None and "ITIME" in hdr1 else 00
         #############################
 
     def read_data(self, fn):
         # for datacube of exposures, need to read as 3D (nexp, npix, npix)
-        fitsfile = fits.open(fn)
+        # memmap + explicit close: demand-paged reads, and the file handle
+        # is released here instead of leaking until GC
+        fitsfile = fits.open(fn, memmap=True)
         scidata=fitsfile[0].data
         hdr=fitsfile[0].header
+        fitsfile.close()
         #self.sub_dir_str = self.filt+"_"+objname
         self.sub_dir_str = '/' + fn.split('/')[-1].replace('.fits', '')
         #self.nexp = scidata.shape[0]
         # rewrite wavextension to be same length as nexp
         if len(scidata.shape)==3:
             self.nwav=scidata.shape[0]
-            [self.wls.append(self.wls[0]) for f in range(self.nwav-1)]
+            # shared-reference expansion; see NIRISS.read_data note
+            self.wls = [self.wls[0]] * self.nwav
             return scidata, hdr
         elif len(scidata.shape)==2:
-            return np.array([scidata,]), hdr
+            # promote to (1, npix, npix) with a newaxis view - np.array() here
+            # would copy the whole image just to add a leading axis
+            return scidata[np.newaxis, :, :], hdr
         else:
             sys.exit("invalid data dimensions for NIRISS. Should have dimensionality of 2 or 3.")
         return scidata, hdr
@@ -384,18 +460,12 @@ class NIRISS:
         self.filt = filt
         self.objname = objname
         #############################
-        lam_c = {"F277W":2.77e-6, 
-                 "F380M": 3.8e-6, 
-                 "F430M": 4.28521033106325E-06,
-                 "F480M": 4.8e-6}
-        
-
-        lam_w = {"F277W":0.2, "F380M": 0.1, "F430M": 0.0436, "F480M": 0.08}
-        # about 12 wavs in f430m lam_bin = {"F277W": 50, "F380M": 20, "F430M":40, "F480M":30}
-        lam_bin = {"F277W": 50, "F380M": 20, "F430M":150, "F480M":30}
-        self.lam_c = lam_c
-        self.lam_w = lam_w
-        self.lam_bin = lam_bin
+        # one lookup in the shared module-level table fetches all the
+        # per-filter constants; legacy dict attributes stay available
+        spec = NIRISS_FILTERS[filt]
+        self.lam_c = NIRISS_LAM_C
+        self.lam_w = NIRISS_LAM_W
+        self.lam_bin = NIRISS_LAM_BIN
         #############################
 
         # only one NRM on JWST:
@@ -403,7 +473,7 @@ class NIRISS:
         self.arrname = "jwst_g7s6c"
         self.pscale_mas = 65.6
         self.pscale_rad = utils.mas2rad(self.pscale_mas)
-        self.mask = NRM_mask_definitions(maskname=self.arrname, chooseholes=chooseholes )
+        self.mask = get_nrm_mask(self.arrname, chooseholes=chooseholes)
         self.mask.hdia = self.mask.hdia
         self.mask.ctrs = np.array(self.mask.ctrs)
         # Hard code any rotations? 
@@ -433,79 +503,92 @@ class NIRISS:
         # for the threshold application.
         # Data reduction gurus: tweak the threshold value with experience...
         # Gurus: tweak cvsupport with use...
-        self.cvsupport_threshold = {"F277W":0.02, "F380M": 0.02, "F430M": 0.02, "F480M": 0.02}
+        # per-instance dict (set_cvsupport_threshold mutates it), seeded
+        # from the filter table
+        self.cvsupport_threshold = dict((f, s.cvsupport) \
+                                        for f, s in NIRISS_FILTERS.items())
         show_cvsupport_threshold(self)
-        self.threshold = self.cvsupport_threshold[filt]
+        self.threshold = spec.cvsupport
 
         self.ref_imgs_dir = os.path.join(out_dir,"refimgs_"+self.filt+"/")
 
         # Wavelength info for NIRISS bands F277W, F380M, F430M, or F480M
-        try:
-            # If user has webbpsf installed, this will work
-            #self.throughput = utils.get_webbpsf_filter(self.filt+"_throughput.fits", \
-            #    trim = (lam_c[self.filt], lam_w[self.filt]))
-            self.throughput = utils.trim_webbpsf_filter(self.filt, specbin=lam_bin[self.filt])
-        except:
-            self.throughput = utils.tophatfilter(lam_c[self.filt], lam_w[self.filt], npoints=11)
+        # memoized (in-process and in ~/.cache/implaneia) - webbpsf filter
+        # load happens once per filter, not once per construction or run
+        self.throughput = niriss_throughput(self.filt)
 
         try:
             self.wls = [utils.combine_transmission(self.throughput, src), ]
         except:
             self.wls = [self.throughput, ]
 
-        self.wavextension = ([lam_c[self.filt],], [lam_w[self.filt],])
+        self.wavextension = ([spec.lam_c,], [spec.lam_w,])
         self.nwav=1
+        # construction-time copy of the monochromatic wavelength list, so
+        # reset_nwav() can restore it after read_data() has grown self.wls
+        self._wls0 = list(self.wls)
 
         #############################
         # Observation info - I don't know yet how JWST data headers will be structured
         self.telname= "JWST"
-        try:
-            self.ra, self.dec = self.hdr0["RA"], self.hdr0["DEC"]
-        except:
+        # no reference header is read at construction time for this class, so
+        # the old per-keyword try/excepts each raised and swallowed an
+        # AttributeError on every instantiation; test once instead
+        hdr0 = getattr(self, "hdr0", None)
+        hdr1 = getattr(self, "hdr1", None)
+        if hdr0 is not None and "RA" in hdr0:
+            self.ra, self.dec = hdr0["RA"], hdr0["DEC"]
+        else:
             self.ra, self.dec = 00, 00
-        try:
-            self.date = self.hdr0["DATE"]
+        if hdr0 is not None and "DATE" in hdr0:
+            self.date = hdr0["DATE"]
             self.month = self.date[-5:-3]
             self.day = self.date[-2:]
             self.year = self.date[:4]
-        except:
+        else:
             lt = time.localtime()
             self.date = "{0}{1:02d}{2:02d}".format(lt[0],lt[1],lt[2])
             self.month = lt[1]
             self.day = lt[2]
             self.year = lt[0]
-        try:
-            self.parang = self.hdr0["PAR_ANG"]
-        except:
-            self.parang = 00
-        try:
-            self.pa = self.hdr0["PA"]
-        except:
-            self.pa = 00
-        try:
-            self.itime = self.hdr1["ITIME"]
-        except:
-            self.itime = 00
+        self.parang = hdr0["PAR_ANG"] if hdr0 is not None and "PAR_ANG" in hdr0 else 00
+        self.pa = hdr0["PA"] if hdr0 is not None and "PA" in hdr0 else 00
+        self.itime = hdr1["ITIME"] if hdr1 is not None and "ITIME" in hdr1 else 00
         #############################
 
     def read_data(self, fn, mode="slice"):
         # mode options are slice or UTR
         # for single slice data, need to read as 3D (1, npix, npix)
         # for utr data, need to read as 3D (ngroup, npix, npix)
-        fitsfile = fits.open(fn)
+        # memmap + explicit close, as in VISIR.read_data above
+        fitsfile = fits.open(fn, memmap=True)
         scidata=fitsfile[0].data
         hdr=fitsfile[0].header
+        fitsfile.close()
         #self.sub_dir_str = self.filt+""
         self.sub_dir_str = '/' + fn.split('/')[-1].replace('.fits', '')
         if len(scidata.shape)==3:
             self.nwav=scidata.shape[0]
-            [self.wls.append(self.wls[0]) for f in range(self.nwav-1)]
+            # one wavelength solution shared by every slice: O(1) list of
+            # references, not nwav-1 python-level appends.  Do not mutate
+            # self.wls[i] in place - all entries are the same object.
+            self.wls = [self.wls[0]] * self.nwav
             return scidata, hdr
         elif len(scidata.shape)==2:
-            return np.array([scidata,]), hdr
+            # promote to (1, npix, npix) with a newaxis view - np.array() here
+            # would copy the whole image just to add a leading axis
+            return scidata[np.newaxis, :, :], hdr
         else:
             sys.exit("invalid data dimensions for NIRISS. Should have dimensionality of 2 or 3.")
 
+    def reset_nwav(self):
+        """ Restore nwav and wls to their construction-time (nwav=1) state.
+            read_data() grows them to match a datacube; callers that want the
+            original state back (e.g. before Calibrate) used to re-construct
+            the whole NIRISS object, re-reading the filter curve from disk. """
+        self.wls = list(self._wls0)
+        self.nwav = 1
+
     def _generate_filter_files():
         """Either from WEBBPSF, or tophat, etc. A set of filter files will also be provided"""
         return None
@@ -544,7 +627,7 @@ class NIRC2:
         self.arrname = "NIRC2_9NRM"
         self.pscale_mas = 9.952 # mas
         self.pscale_rad = utils.mas2rad(self.pscale_mas)
-        self.mask = NRM_mask_definitions(maskname=self.arrname)
+        self.mask = get_nrm_mask(self.arrname)
         self.mask.ctrs = np.array(self.mask.ctrs)
         # Hard code -1.5 deg rotation in data (April 2016)
         # (can be moved to NRM_mask_definitions later)
@@ -560,9 +643,10 @@ class NIRC2:
         if type(reffile)==str:
             reffile = [reffile,]
         for fn in reffile:
-            reffits = fits.open(fn)
-            self.hdr.append(reffits[0].header)
-            reffits.close()
+            # header-only peek; see the GPI reffile loop for the with-block
+            # rationale
+            with fits.open(fn) as reffits:
+                self.hdr.append(reffits[0].header)
         # instrument settings
         self.band = self.hdr[0]["FWINAME"]
 
@@ -677,7 +761,7 @@ class NIRC2:
 
     def read_data(self, fn):
 
-        fitsfile = fits.open(fn)
+        fitsfile = fits.open(fn, memmap=True)
         sci=fitsfile[0].data
         hdr=fitsfile[0].header
         fitsfile.close()
@@ -689,11 +773,13 @@ class NIRC2:
                 return sci, hdr
             elif self.mode=="BROADBAND":
                 self.nwav=sci.shape[0]
-                [self.wls.append(self.wls[0]) for f in range(self.nwav-1)]
+                # shared-reference expansion; see NIRISS.read_data note
+                self.wls = [self.wls[0]] * self.nwav
                 return sci, hdr
         elif len(sci.shape)==2:
             if self.mode=="BROADBAND":
-                return np.array([sci,]), hdr
+                # newaxis view, not a copy; see NIRISS.read_data note
+                return sci[np.newaxis, :, :], hdr
         else:
             sys.exit("invalid data dimensions for NIRC2. Should have dimensionality of 2 or 3.")
 
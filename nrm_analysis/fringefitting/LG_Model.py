@@ -13,17 +13,13 @@ Imports:
 """
 from __future__ import print_function
 import numpy as np
-import scipy.special
 #import math
 import nrm_analysis.misctools.utils as utils
 import sys, os
-import time
 from astropy.io import fits
 import logging
-from argparse import ArgumentParser
 from . import leastsqnrm as leastsqnrm
 from . import analyticnrm2
-from . import subpix
 
 _default_log = logging.getLogger('NRM_Model')
 #_default_log.setLevel(logging.INFO)
@@ -84,6 +80,21 @@ mm = 1.0e-3 * m
 um = 1.0e-6 * m
 mas = 1.0e-3 / (60*60*180/np.pi) # in radians
 
+# WARNING! JWST CHOOSEHOLES CODE NOW DUPLICATED IN mask_definitions.py WARNING! ###
+# as_built names, C2 open, C5 closed, but as designed coordinates.
+# Assemble holes by actual open segment names.  Either the full mask or the
+# subset-of-holes mask will be V2-reversed after the as_designed centers
+# are installed in the object.  Constants: built once at import, shared by
+# every NRM_Model construction.
+_ALLHOLES = ('b4','c2','b5','b2','c1','b6','c6')
+_HOLEDICT = {'b4': [ 0.00000000,  -2.640000],       #B4 -> B4
+             'c2': [-2.2863100 ,  0.0000000],       #C5 -> C2
+             'b5': [ 2.2863100 , -1.3200001],       #B3 -> B5
+             'b2': [-2.2863100 ,  1.3200001],       #B6 -> B2
+             'c1': [-1.1431500 ,  1.9800000],       #C6 -> C1
+             'b6': [ 2.2863100 ,  1.3200001],       #B2 -> B6
+             'c6': [ 1.1431500 ,  1.9800000]}       #C1 -> C6
+
 
 class NRM_Model():
 
@@ -101,14 +112,17 @@ class NRM_Model():
         phi (rad) default changedfrom "perfect" to None (with bkwd compat.)
         """ 
 
-        # define a handler to write log messages to stdout
-        sh = logging.StreamHandler(stream=sys.stdout)
-
-        # define the format for the log messages, here: "level name: message"
-        formatter = logging.Formatter("[%(levelname)s]: %(message)s")
-        sh.setFormatter(formatter)
+        # define a handler to write log messages to stdout - but only once:
+        # the logger is shared module state, and adding a new StreamHandler
+        # per NRM_Model construction made every record be emitted N times
+        # after N constructions (each with a fresh Formatter allocation)
         self.logger = log
-        self.logger.addHandler(sh)
+        if not self.logger.handlers:
+            sh = logging.StreamHandler(stream=sys.stdout)
+            # format for the log messages, here: "level name: message"
+            formatter = logging.Formatter("[%(levelname)s]: %(message)s")
+            sh.setFormatter(formatter)
+            self.logger.addHandler(sh)
 
         self.holeshape = holeshape
         self.pixel = pixscale # det pix in rad (square)
@@ -116,20 +130,10 @@ class NRM_Model():
         self.maskname = mask
         self.pixweight = pixweight 
 
-        # WARNING! JWST CHOOSEHOLES CODE NOW DUPLICATED IN mask_definitions.py WARNING! ###
-        holedict = {} # as_built names, C2 open, C5 closed, but as designed coordinates
-        # Assemble holes by actual open segment names.  Either the full mask or the
-        # subset-of-holes mask will be V2-reversed after the as_designed ceenters 
-        # are installed in the object.
-        allholes = ('b4','c2','b5','b2','c1','b6','c6')
-        b4,c2,b5,b2,c1,b6,c6 = ('b4','c2','b5','b2','c1','b6','c6')
-        holedict['b4'] = [ 0.00000000,  -2.640000]       #B4 -> B4
-        holedict['c2'] = [-2.2863100 ,  0.0000000]       #C5 -> C2
-        holedict['b5'] = [ 2.2863100 , -1.3200001]       #B3 -> B5
-        holedict['b2'] = [-2.2863100 ,  1.3200001]       #B6 -> B2
-        holedict['c1'] = [-1.1431500 ,  1.9800000]       #C6 -> C1
-        holedict['b6'] = [ 2.2863100 ,  1.3200001]       #B2 -> B6
-        holedict['c6'] = [ 1.1431500 ,  1.9800000]       #C1 -> C6
+        # hole tables are module-level constants (_HOLEDICT/_ALLHOLES below);
+        # they used to be rebuilt on every NRM_Model construction
+        holedict = _HOLEDICT
+        allholes = _ALLHOLES
         if mask=='jwst':
             # as designed MB coordinates (Mathilde Beaulieu, Peter, Anand).
             # as designed: segments C5 open, C2 closed, meters V2V3 per Paul Lightsey def
@@ -493,8 +497,10 @@ class NRM_Model():
                 leastsqnrm.matrix_operations(image, self.fittingmodel, \
                 verbose=False)
 
-        print("NRM_Model Raw Soln:")
-        print(self.soln)
+        # render the array into the same payload and write once - this runs
+        # per integration and two prints per slice add up under a pool
+        sys.stdout.write("NRM_Model Raw Soln:\n%s\n"
+                         % np.array2string(self.soln))
 
         self.rawDC = self.soln[-1]
         self.flux = self.soln[0]
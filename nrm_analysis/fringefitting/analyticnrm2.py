@@ -9,7 +9,6 @@ import scipy.special
 import sys
 from astropy.io import fits
 import os
-import matplotlib.pyplot as pl
 import scipy.special
 #import unittest
 
@@ -30,6 +29,23 @@ vprint("CWD: "+os.getcwd())
 from  .. import misctools  # why can't I import misctools.utils this way too????
 from . import hextransformEE # change to rel imports!
 
+# Optional numba acceleration of the harmonic fringe kernels.
+# Falls back to a (single-pass) numpy path if numba is not installed.
+try:
+    import numba
+    from numba import njit
+except ImportError:  # numba not required - pip install if you want the fast path
+    numba = None
+
+# Optional GPU backend for the dense fringe kernels: opt in by setting the
+# environment variable IMPLANEIA_BACKEND=cupy (results come back as numpy).
+cupy = None
+if os.environ.get("IMPLANEIA_BACKEND", "").lower() == "cupy":
+    try:
+        import cupy
+    except ImportError:  # pip install cupy if you have a CUDA GPU
+        cupy = None
+
 def image_center(fov, oversample, psf_offset):
     """ Image center location in oversampled pixels
     input
@@ -155,15 +171,25 @@ def interf(kx, ky, **kwargs):
     vprint(" affine2d ", affine2d.name)
 
     # Question: where should the affine transf of psf_offset be done?  Here before phasor?
-    # Figure out wht is correct... 
-    # I suspect we don't 'affine2d transform the psf offsets - 
+    # Figure out wht is correct...
+    # I suspect we don't 'affine2d transform the psf offsets -
     # they are already in distorted coords... (?)   AS LG++ 08/14 2018 Ann Arbor
+    #
+    # The distorted grid and the affine phase screen are identical for every
+    # hole, so compute them once here instead of once per hole inside
+    # phasor() - that saved N-1 full-grid complex exponentials per fringe.
+    # phasor() itself is kept as-is for standalone use.
+    kxc = kx - psfctr[0]
+    kyc = ky - psfctr[1]
+    kxprime, kyprime = affine2d.distortFargs(kxc, kyc)
     fringe_complexamp = 0j
     for hole, ctr in enumerate(ctrs):
-        fringe_complexamp += phasor((kx - psfctr[0]), (ky - psfctr[1]), 
-                                    ctr[0], ctr[1], lam, phi[hole], pitch, affine2d)
+        fringe_complexamp += np.exp(-2*np.pi*1j*\
+                ((pitch*ctr[0]*kxprime + pitch*ctr[1]*kyprime)/lam + \
+                 phi[hole]/lam))
     # debugging shows fringe orients to be same as hex orients & rect orients
-    return fringe_complexamp # now affine2d angle rotates image CCW.
+    return fringe_complexamp * affine2d.distortphase(kxc, kyc)
+    # now affine2d angle rotates image CCW.
 
 
 def ASF(detpixel, fov, oversample, ctrs, d, lam, phi, psf_offset, affine2d, verbose=False):
@@ -301,16 +327,45 @@ def PSF(detpixel, fov, oversample, ctrs, d, lam, phi, psf_offset, affine2d,
             "d: {0}, wavelength: {1}, pistons: {2}, shape: {3}".format(d, lam, 
             phi, shape)))
 
-    return  (asf*asf.conj()).real
+    # |asf|^2 via the real/imag parts: same result as (asf*asf.conj()).real
+    # without the full complex multiply or the complex-valued temporary
+    return  asf.real**2 + asf.imag**2
 
 ######################################################################
 #  New in LG++ - harmonic fringes
 #  New in LG++ - model_array(), ffc, ffs moved here from leastsqnrm.py
 ######################################################################
+if numba is not None:
+    # Serial on purpose: the per-slice grids are small (low arithmetic
+    # intensity), so parallel=True burns cores without buying wall time.
+    # Parallelism belongs at the integration level (FringeFitter threads=).
+    @njit(fastmath=True, cache=True)
+    def _harmonic_fringes_nb(n, c0, c1, mx, my, sx, sy, det, bx, by, pitch, lam):
+        """ jitted kernel: evaluate both cos & sin fringes in one pass over the
+            (n, n) oversampled grid.  Affine2d is passed in as its scalar
+            parameters because numba cannot see the python object.
+        """
+        cosf = np.empty((n, n))
+        sinf = np.empty((n, n))
+        fac = 2.0 * np.pi * pitch / lam
+        for i in range(n):
+            u = i - c0
+            for j in range(n):
+                v = j - c1
+                kxprime = ( my*u - sy*v)/det
+                kyprime = (-sx*u + mx*v)/det
+                arg = fac * (kxprime*bx + kyprime*by)
+                cosf[i, j] = 2.0 * np.cos(arg)
+                sinf[i, j] = 2.0 * np.sin(arg)
+        return cosf, sinf
+
+
 def harmonicfringes(**kwargs):
-    """  returns sine and cosine fringes.  real arrays, in image space 
+    """  returns sine and cosine fringes.  real arrays, in image space
          this works in the oversampled space that is each slice of the model
-         TBD: switch to pitch for calc here in calls to ffc ffs
+         The phase argument is evaluated once and shared by the cosine and
+         sine fringes (it used to be computed twice, once in each of the
+         ffc & ffs fromfunction calls).
     """
     fov = kwargs['fov'] # in detpix
     pitch = kwargs['pitch'] # detpixscale
@@ -334,14 +389,28 @@ def harmonicfringes(**kwargs):
         vprint(" over  {}".format( oversample), end="" )
         vprint(" fov/detpix  {}".format( fov), end="" )
 
-    return (np.fromfunction(ffc, (fov*oversample, fov*oversample), c=ImCtr,
-                                                                   baseline=baseline,
-                                                                   lam=lam, pitch=cpitch,
-                                                                   affine2d=affine2d),
-            np.fromfunction(ffs, (fov*oversample, fov*oversample), c=ImCtr,
-                                                                   baseline=baseline,
-                                                                   lam=lam, pitch=cpitch,
-                                                                   affine2d=affine2d))
+    n = fov*oversample
+    if cupy is not None:
+        # evaluate on the GPU; distortFargs is plain elementwise arithmetic
+        # so it is backend-agnostic.  One device->host copy per fringe pair.
+        kx = cupy.arange(n, dtype=cupy.float64)[:,None] - ImCtr[0]
+        ky = cupy.arange(n, dtype=cupy.float64)[None,:] - ImCtr[1]
+        kxprime, kyprime = affine2d.distortFargs(kx, ky)
+        arg = 2*np.pi*cpitch*(kxprime*baseline[0] + kyprime*baseline[1]) / lam
+        return (cupy.asnumpy(2*cupy.cos(arg)), cupy.asnumpy(2*cupy.sin(arg)))
+    if numba is not None:
+        return _harmonic_fringes_nb(n, ImCtr[0], ImCtr[1],
+                                    affine2d.mx, affine2d.my,
+                                    affine2d.sx, affine2d.sy,
+                                    affine2d.determinant,
+                                    baseline[0], baseline[1], cpitch, lam)
+    # numpy fallback - same math as ffc & ffs but the phase argument is
+    # calculated once for the pair rather than once per fromfunction call.
+    kx = np.arange(n, dtype=np.float64)[:,None] - ImCtr[0]
+    ky = np.arange(n, dtype=np.float64)[None,:] - ImCtr[1]
+    kxprime, kyprime = affine2d.distortFargs(kx, ky)
+    arg = 2*np.pi*cpitch*(kxprime*baseline[0] + kyprime*baseline[1]) / lam
+    return (2*np.cos(arg), 2*np.sin(arg))
 
 def ffc(kx, ky, **kwargs):
     ko = kwargs['c'] # the PSF ctr
@@ -364,6 +433,18 @@ def ffs(kx, ky, **kwargs):
 
 
 
+_BASELINE_INDEX_CACHE = {}
+
+def baseline_indices(nholes):
+    """ (nholes choose 2, 2) int array of hole-pair indices, cached """
+    if nholes not in _BASELINE_INDEX_CACHE:
+        _BASELINE_INDEX_CACHE[nholes] = np.array(
+            [(i, j + i + 1) for i in range(nholes - 1)
+                            for j in range(nholes - 1)
+                            if j + i + 1 < nholes], dtype=int)
+    return _BASELINE_INDEX_CACHE[nholes]
+
+
 def model_array(ctrs, lam, oversample, pitch, fov, d, psf_offset=(0,0),
                 shape ='circ', affine2d=None, verbose=False):
     # pitch is detpixel
@@ -399,26 +480,25 @@ def model_array(ctrs, lam, oversample, pitch, fov, d, psf_offset=(0,0),
     # test that this array is almost completely real...
     #print("***>>> asf_pb.reals: {}  asf_pb.imags:{} ".format( np.abs(asf_pb.real).sum(), np.abs(asf_pb.imag).sum()))
     # ... yes it is overwhelmingly real, like 1e-8ish in imaginary cf real.
-    primary_beam = (asf_pb*asf_pb.conj()).real
+    primary_beam = asf_pb.real**2 + asf_pb.imag**2
     
 
-    alist = []
-    for i in range(nholes - 1):
-        for j in range(nholes - 1):
-            if j + i + 1 < nholes:
-                alist = np.append(alist, i)
-                alist = np.append(alist, j + i + 1)
-    alist = alist.reshape((len(alist)//2, 2))
+    # integer hole-pair indices, memoized per hole count - model_array runs
+    # once per slice per integration, and the pair table only depends on
+    # nholes (no float np.append/reshape churn)
+    alist = baseline_indices(nholes)
+
+    # SoA layout: two contiguous per-baseline component arrays computed in one
+    # vectorized gather, so the fringe loop below reads scalars from cache
+    # instead of re-slicing the ctrs array per pair.
+    bx = np.ascontiguousarray(ctrs[alist[:,0], 0] - ctrs[alist[:,1], 0])
+    by = np.ascontiguousarray(ctrs[alist[:,0], 1] - ctrs[alist[:,1], 1])
 
     ffmodel = []
     ffmodel.append(nholes * np.ones(modelshape))
-    for basepair in alist:
-        #print("i", int(basepair[0]), end="")
-        #print("  j", int(basepair[1]), end="")
-        baseline = ctrs[int(basepair[0])] - ctrs[int(basepair[1])]
-        #print(baseline)
+    for q in range(alist.shape[0]):
         cosfringe, sinfringe = harmonicfringes(fov=fov, pitch=pitch, psf_offset=psf_offset,
-                                               baseline=baseline,
+                                               baseline=(bx[q], by[q]),
                                                oversample=oversample,
                                                lam=lam,
                                                affine2d=affine2d)
@@ -124,8 +124,13 @@ class NrmIntegrationResult(object):
             file_image = getattr(self, attribute_name)
             file_image = file_image[file_number]
             
-            data = fits.getdata(file_image)
-            header = fits.getheader(file_image)
+            # one open for both data and header - getdata followed by
+            # getheader scanned the same file twice
+            with fits.open(file_image, memmap=True) as hdulist:
+                # [-1]: image HDU whether the fitter wrote a plain or a
+                # Rice-compressed file; the keywords live in the primary
+                data = np.asarray(hdulist[-1].data)
+                header = hdulist[0].header
             gc = aplpy.FITSFigure(data, figure=fig, north=False,subplot=(1,3,j+1))
             vmin = np.min(data)
             vmax = np.max(data)
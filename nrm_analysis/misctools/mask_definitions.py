@@ -5,7 +5,6 @@ import math
 import sys
 import time
 #import webbpsf.poppy as poppy
-import poppy
 from nrm_analysis.misctools.utils import makedisk, rotate2dccw
 from astropy.io import fits
 from copy import copy
@@ -3,11 +3,28 @@ from __future__ import print_function
 import numpy as np
 import numpy.fft as fft
 from astropy.io import fits
+import math
 import os, sys
 import pickle as pickle
 from scipy.special import comb
 import time
-import poppy.matrixDFT as matrixDFT
+
+# poppy drags in a large dependency chain at import time; load it on first
+# use so metadata-only consumers of this module start fast
+matrixDFT = None
+
+def _get_matrixDFT():
+    global matrixDFT
+    if matrixDFT is None:
+        import poppy.matrixDFT
+        matrixDFT = poppy.matrixDFT
+    return matrixDFT
+
+try:
+    import numba
+    from numba import njit, prange
+except ImportError:  # numba is optional - pure-python paths remain below
+    numba = None
 
 m_ = 1.0
 mm_ =  m_/1000.0
@@ -127,10 +144,13 @@ class Affine2d():
 
         self.rotradccw = rotradccw
         if rotradccw is not None:
-            mx = np.cos(rotradccw)
-            my = np.cos(rotradccw)
-            sx = -np.sin(rotradccw)
-            sy =  np.sin(rotradccw)
+            # scalar math-module trig, evaluated once each: no ufunc
+            # dispatch or 0-d array wrapping for four calls per transform
+            c, s = math.cos(rotradccw), math.sin(rotradccw)
+            mx = c
+            my = c
+            sx = -s
+            sy =  s
             xo = 0.0
             yo = 0.0
 
@@ -153,6 +173,15 @@ class Affine2d():
         vector it is dotted with is in image space."""
         self.phase_2vector = np.array((my*xo - sx*yo, mx*yo - sy*xo)) / self.determinant
 
+        # Fold 1/determinant into per-call constants once: distortFargs and
+        # distortphase run over whole (u,v) grids, and an array divide costs
+        # several multiplies.
+        self._my_over_det = my / self.determinant
+        self._sy_over_det = sy / self.determinant
+        self._sx_over_det = sx / self.determinant
+        self._mx_over_det = mx / self.determinant
+        self._phase_factor = 2*np.pi*1j / self.determinant
+
         if self.determinant == 0.0:
             print("Potentially fatal: Determinant of Affine2d transformation is zero")
 
@@ -204,8 +233,8 @@ class Affine2d():
         numpy arrays uprime,vprime (like u,v) arguments of F when the config space
         is distorted by the affine2d transformation.
         """
-        uprime = ( self.my*u - self.sy*v)/self.determinant
-        vprime = (-self.sx*u + self.mx*v)/self.determinant
+        uprime =  self._my_over_det*u - self._sy_over_det*v
+        vprime = -self._sx_over_det*u + self._mx_over_det*v
         return uprime, vprime
 
                       
@@ -227,8 +256,8 @@ class Affine2d():
 
          u and v have to be in inverse length units, viz. radians in image space / wavelength?
         """
-        return np.exp( 2*np.pi*1j/self.determinant * \
-                   (self.phase_2vector[0]*u + self.phase_2vector[1]*v) )  # / self.absdeterminant NO: error in first pass coding affine2d 
+        return np.exp( self._phase_factor * \
+                   (self.phase_2vector[0]*u + self.phase_2vector[1]*v) )  # / self.absdeterminant NO: error in first pass coding affine2d
 
                       
     def get_rotd(self): 
@@ -300,12 +329,12 @@ def rotate2dccw(vectors, thetarad):
     positive thetarad: y increases under slight rotation
     positive thetarad = CCW rotation
     """
-    c, s = (np.cos(thetarad), np.sin(thetarad))
-    ctrs_rotated = []
-    for vector in vectors:
-        ctrs_rotated.append([c*vector[0] - s*vector[1], 
-                             s*vector[0] + c*vector[1]])
-    return np.array(ctrs_rotated)
+    c, s = (math.cos(thetarad), math.sin(thetarad))
+    # one matmul against the 2x2 rotation matrix replaces the per-vector
+    # python loop (same [c*x - s*y, s*x + c*y] result, row by row)
+    rotmat = np.array(((c, -s),
+                       (s,  c)))
+    return np.asarray(vectors) @ rotmat.T
 
 
 def centerpoint(s):
@@ -460,7 +489,8 @@ def center_imagepeak(img, r='default', cntrimg = True):
     cropped = img[int(peakx-r):int(peakx+r+1), int(peaky-r):int(peaky+r+1)]
     print('Cropped image shape:',cropped.shape)
     print('value at center:', cropped[r,r])
-    print(np.where(cropped == cropped.max()))
+    # single argmax pass instead of a max pass plus a full == comparison
+    print(np.unravel_index(np.argmax(cropped), cropped.shape))
     return cropped
 
 
@@ -486,10 +516,13 @@ def min_distance_to_edge(img, cntrimg = True):
         # Peak of the image can be anywhere
         ann = np.ones((img.shape[0], img.shape[1]))
         
-    peakmask = np.where(img==np.nanmax(np.ma.masked_invalid(img[ann==1])))
+    # masked gather + nanmax once: this value used to be recomputed for the
+    # print below, building a second masked copy of the image
+    peakval = np.nanmax(np.ma.masked_invalid(img[ann==1]))
+    peakmask = np.where(img==peakval)
     # following line takes care of peaks at two or more identical-value max pixel locations:
     peakx, peaky = peakmask[0][0], peakmask[1][0]
-    print('utils.min_distance_from_edge: peaking on: ',np.nanmax(np.ma.masked_invalid(img[ann==1])))
+    print('utils.min_distance_from_edge: peaking on: ',peakval)
     print('putils.min_distance_from_edge: peak x,y:', peakx, peaky)
 
     dhigh = (img.shape[0] - peakx - 1, img.shape[1] - peaky - 1)
@@ -543,7 +576,7 @@ def find_centroid(a, thresh, verbose=True):
     anand@stsci.edu 2018.02
     """
 
-    ft = matrixDFT.MatrixFourierTransform()
+    ft = _get_matrixDFT().MatrixFourierTransform()
     cv = ft.perform(a, a.shape[0], a.shape[0]) 
     cvmod, cvpha = np.abs(cv), np.angle(cv)
     cvmod = cvmod/cvmod.max() # normalize to unity peak
@@ -667,23 +700,54 @@ def trim(m, s):
     return (np.asarray(xl), np.asarray(yl))
 
 
+if numba is not None:
+    @njit(parallel=True, cache=True)
+    def _denan_fill(a2, xnan, ynan, s):
+        # median-of-neighbors for every flagged pixel, compiled.  Each prange
+        # iteration writes only its own output slot, so no locking is needed.
+        # No fastmath here: its no-NaN assumption would break the isnan
+        # filtering this kernel is built around.
+        # The window grows from the requested box size until it contains at
+        # least one good pixel, so clusters of NaNs still get filled.
+        out = np.empty(xnan.shape[0])
+        ny, nx = a2.shape
+        for qq in prange(xnan.shape[0]):
+            x = xnan[qq]
+            y = ynan[qq]
+            w = s
+            med = np.nan
+            while np.isnan(med) and w < ny:
+                box = a2[max(x-w, 0):min(x+w+1, ny),
+                         max(y-w, 0):min(y+w+1, nx)].flatten()
+                good = box[~np.isnan(box)]
+                if good.shape[0] > 0:
+                    med = np.median(good)
+                w = w + 1
+            out[qq] = med
+        return out
+
+
 def deNaN(s, datain):
     ## Get rid of NaN values with nearest neighbor median
     fov=datain.shape[0]
     a2 = np.zeros((2*fov, 2*fov))
-    print("FOV:", fov, "selection shape:", (fov//2,3*fov//2,fov//2,3*fov/2))
+    print("FOV:", fov, "selection shape:", (fov//2,3*fov//2,fov//2,3*fov//2))
     a2[fov//2:fov+fov//2, fov//2 : fov+fov//2 ] = datain
+    # find the bad pixels once up front - the fill loop visits only those
+    # positions instead of re-masking the whole padded array per pixel
     xnan, ynan = np.where(np.isnan(a2))
-    for qq in range(len(a2[np.where(np.isnan(a2))])):
-        a2[xnan[qq], ynan[qq]] = neighbor_median((xnan[qq],ynan[qq]), s, a2)
+    if numba is not None and len(xnan) > 0:
+        a2[xnan, ynan] = _denan_fill(a2, xnan, ynan, s)
+    else:
+        for xx, yy in zip(xnan, ynan):
+            a2[xx, yy] = neighbor_median((xx, yy), s, a2)
     return a2[fov//2:fov +fov//2, fov//2: fov+fov//2]
 
 
 def neighbor_median(ctr, s, a2):
     # take the median of nearest neighbors within box side s
     atmp = a2[ctr[0]-s:ctr[0]+s+1, ctr[1]-s:ctr[1]+s+1]
-    med = np.median(atmp[np.isnan(atmp)==False])
-    #print med
+    return np.median(atmp[np.isnan(atmp)==False])
 
 
 def get_fits_filter(fitsheader, ):
@@ -792,20 +856,15 @@ def combine_transmission(filt, SRC):
     ''' SRC is a spectral type string, e.g. A0V 
         not the neatest, but gets the job done.'''
     import pysynphot
-    filt_wls = np.zeros(len(filt))
-    filt_wght = np.zeros(len(filt))
-    for ii in range(len(filt)):
-        filt_wls[ii] = filt[ii][1] # in m
-        filt_wght[ii] = filt[ii][0]
+    # filt rows are (weight, wavelength/m) - split in one vectorized pass
+    filt = np.asarray(filt)
+    filt_wght = filt[:, 0]
+    filt_wls = filt[:, 1] # in m
     src = specFromSpectralType(SRC)
-    src = src.resample(np.array(filt_wls)*1.0e10) # converts to angstrom for pysynphot
+    src = src.resample(filt_wls*1.0e10) # converts to angstrom for pysynphot
     specwavl, specwghts = src.getArrays()
     totalwght = specwghts * filt_wght
-    transmissionlist = []
-    ang_to_m = 1.0e-10
-    for ii in range(len(filt_wls)):
-        transmissionlist.append((totalwght[ii], filt_wls[ii]))
-    return transmissionlist
+    return list(zip(totalwght, filt_wls))
 
 
 def makeA(nh, verbose=False):
@@ -991,9 +1050,8 @@ def get_webbpsf_filter(filtfile, specbin=None, trim=False):
     """
     W = 1 # remove confusion - wavelength index
     T = 0 # remove confusion - trans index after reding in...
-    f = fits.open(filtfile)
-    thru = f[1].data
-    f.close()
+    with fits.open(filtfile) as f:
+        thru = f[1].data
     tmp_array = np.zeros((len(thru), 2))
     for i in range(len(thru)):  
         tmp_array[i,W] = thru[i][0] * 1.0e-10   # input in angst  _ANGSTROM = 1.0e-10
@@ -1225,19 +1283,16 @@ def printout(ctrs, infostr=""):  # ctrs.shape=(Nholes,2)
 
 
 def baselinify(ctrs):
+    # vectorized over all hole pairs (triu_indices enumerates them in the
+    # same (0,1),(0,2),... order as the old nested loop); the differences
+    # are computed once and np.hypot fuses the square/sum/sqrt without the
+    # per-pair temporaries
     N = len(ctrs)
-    uvs = np.zeros((N*(N-1)//2, 2))
-    label = np.zeros((N*(N-1)//2, 2))
-    bllengths = np.zeros(N*(N-1)//2)
-    nn=0
-    for ii in range(N-1):
-        for jj in range(N-ii-1):
-            uvs[jj+nn, 0] = ctrs[ii,0] - ctrs[ii+jj+1,0]
-            uvs[jj+nn, 1] = ctrs[ii,1] - ctrs[ii+jj+1,1]
-            bllengths[jj+nn] = np.sqrt((ctrs[ii,0]-ctrs[ii+jj+1,0])**2 +\
-                        (ctrs[ii,1]-ctrs[ii+jj+1,1])**2)
-            label[jj+nn,:] = np.array([ii, ii+jj+1])
-        nn = nn+jj+1
+    ctrs = np.asarray(ctrs)
+    ii, jj = np.triu_indices(N, k=1)
+    uvs = ctrs[ii, :2] - ctrs[jj, :2]
+    bllengths = np.hypot(uvs[:, 0], uvs[:, 1])
+    label = np.column_stack((ii, jj)).astype(np.float64)
     return uvs, bllengths, label
 
 def count_cps(ctrs):
@@ -46,6 +46,51 @@ from nrm_analysis.modeling.binarymodel import model_cp_uv, model_allvis_uv, mode
 from nrm_analysis.modeling.multimodel import model_bispec_uv
 
 from multiprocessing import Pool
+from collections import namedtuple
+
+# Structure-of-arrays container for the stacked per-file fringe observables:
+# each field is one (nexps, nbl or ncp) float array, so downstream consumers
+# get typed attribute access and contiguous per-quantity arrays instead of
+# string-keyed dict lookups.
+Observables = namedtuple("Observables", "amps phases cps cas")
+
+# Optional numba fast path for the per-triangle/baseline exposure reductions
+# in Calibrate.calib_steps.  Single compiled pass over contiguous
+# (nexps, nquantity) arrays; numpy masked-array path remains the fallback.
+try:
+    from numba import guvectorize, float64
+
+    @guvectorize([(float64[:,:], float64[:])], '(n,t)->(t)', nopython=True)
+    def _mean_over_exposures(arr, out):
+        n = arr.shape[0]
+        for k in range(arr.shape[1]):
+            s = 0.0
+            for i in range(n):
+                s += arr[i, k]
+            out[k] = s / n
+
+    @guvectorize([(float64[:,:], float64[:])], '(n,t)->(t)', nopython=True)
+    def _moment2_over_exposures(arr, out):
+        # second central moment, matching mstats.moment(..., moment=2, axis=0)
+        n = arr.shape[0]
+        for k in range(arr.shape[1]):
+            s = 0.0
+            for i in range(n):
+                s += arr[i, k]
+            mean = s / n
+            v = 0.0
+            for i in range(n):
+                d = arr[i, k] - mean
+                v += d * d
+            out[k] = v / n
+except ImportError:  # numba not required - pip install if you want the fast path
+    _mean_over_exposures = None
+    _moment2_over_exposures = None
+
+try:
+    import h5py  # pip install if you want chunked hdf5 observable output
+except ImportError:
+    h5py = None
 
 class FringeFitter:
     def __init__(self, instrument_data, **kwargs):
@@ -66,6 +111,10 @@ class FringeFitter:
         debug - will plot the FT of your data next to the FT of a reference PSF.
                 Needs poppy package to run
         verbose_save - saves more than the standard files
+        firstfew - if set, only the first N integrations of each cube are fit
+        save_hdf5 - also write the stacked observables to one chunked hdf5 file
+        dtype - cast each integration to this dtype (e.g. np.float32) before
+                fitting; default keeps the cube's native precision
         interactive - default True, prompts user to overwrite/create fresh directory.  
                       False will overwrite files where necessary.
 
@@ -129,6 +178,34 @@ class FringeFitter:
             self.save_txt_only = kwargs["save_txt_only"]
         else:
             self.save_txt_only = False
+        if "compress_fits" in kwargs:
+            # tile-compress (Rice) the diagnostic fits files - 3-5x smaller,
+            # fits.getdata() decompresses transparently on read-back
+            self.compress_fits = kwargs["compress_fits"]
+        else:
+            self.compress_fits = False
+        if "save_hdf5" in kwargs:
+            # also mirror the stacked observables of each file into one
+            # chunked hdf5 file - much faster to re-open and slice than the
+            # per-slice text files (needs h5py)
+            self.save_hdf5 = kwargs["save_hdf5"]
+        else:
+            self.save_hdf5 = False
+        if "firstfew" in kwargs:
+            # fit only the first N integrations of the cube.  Applied before
+            # the contiguous copy in fit_fringes_parallel, so with memmapped
+            # input only those planes are ever read off disk.
+            self.firstfew = kwargs["firstfew"]
+        else:
+            self.firstfew = None
+        if "dtype" in kwargs:
+            # e.g. np.float32 - cast each integration before fitting.  For
+            # SNR-limited data single precision halves the memory bandwidth
+            # of the centroid/fit passes; default None keeps the cube's own
+            # (usually float64) precision.
+            self.dtype = kwargs["dtype"]
+        else:
+            self.dtype = None
         #######################################################################
 
 
@@ -177,63 +254,102 @@ class FringeFitter:
         if type(fns) == str:
             fns = [fns, ]
 
-        # Can get fringes for images in parallel
-        #tore_dict = [{"object":self, "file":self.datadir+"/"+fn,"id":jj} \ # AS remove self.datadir
-        store_dict = [{"object":self, "file":                 fn,"id":jj} \
-                        for jj,fn in enumerate(fns)]
-
         t2 = time.time()
-        for jj, fn in enumerate(fns):
-            #it_fringes_parallel({"object":self, "file": self.datadir+"/"+fn,\ # AS remove self.datadir
-            fit_fringes_parallel({"object":self, "file":                  fn,\
-                                  "id":jj}, threads)
+        if threads > 0 and len(fns) > 1:
+            # each file is an independent fit writing to its own output
+            # subdirectory, so spread the files over worker processes and
+            # fit each file's integrations serially inside its worker
+            pool = Pool(processes=min(threads, len(fns)))
+            print("Running fit_fringes over {0} files with {1} threads".format(
+                   len(fns), threads))
+            all_obs = pool.map(_fit_one_file,
+                               [(self, fn, jj) for jj, fn in enumerate(fns)])
+            pool.close()
+            pool.join()
+            self.observables_by_file = dict(zip(fns, all_obs))
+            self.observables = all_obs[-1]
+        else:
+            for jj, fn in enumerate(fns):
+                #it_fringes_parallel({"object":self, "file": self.datadir+"/"+fn,\ # AS remove self.datadir
+                fit_fringes_parallel({"object":self, "file":                  fn,\
+                                      "id":jj}, threads)
         t3 = time.time()
         print("Parallel with {0} threads took {1}s to fit all fringes".format(\
                threads, t3-t2))
 
 
+    def write_image(self, data, fn, header=None):
+        # Rice tile compression keeps headers readable, allows per-tile random
+        # access, and is both smaller and faster to write than gzipped fits.
+        if self.compress_fits:
+            try:
+                comphdu = fits.CompImageHDU(data=data,
+                                            compression_type='RICE_1',
+                                            tile_shape=(64, 64))
+            except TypeError:
+                # astropy < 5.3 spells it tile_size (reversed axis order,
+                # moot for a square tile)
+                comphdu = fits.CompImageHDU(data=data,
+                                            compression_type='RICE_1',
+                                            tile_size=[64, 64])
+            fits.HDUList([fits.PrimaryHDU(header=header),
+                          comphdu]).writeto(fn, overwrite=True)
+        else:
+            fits.PrimaryHDU(data=data, header=header).writeto(fn,
+                                            overwrite=True)
+
+    def write_observables_hdf5(self):
+        # one dataset per observable, chunked per integration so downstream
+        # quick-look tools can slice single exposures without reading the
+        # whole stack
+        if h5py is None:
+            print("h5py not installed - skipping hdf5 observable output")
+            return
+        fn = self.savedir + self.sub_dir_str + "/observables.h5"
+        with h5py.File(fn, "w", libver="latest") as h5:
+            for key, arr in zip(Observables._fields, self.observables):
+                h5.create_dataset(key, data=arr,
+                                  chunks=(1,) + arr.shape[1:])
+            h5.attrs["arrname"] = self.instrument_data.arrname
+            h5.attrs["filt"] = getattr(self.instrument_data, "filt", "")
+        print("Wrote hdf5 observables %s" % fn)
+
     def save_output(self, slc, nrm):
+        # build the per-object output directory string once per call instead
+        # of re-concatenating it for every file written below
+        outdir = self.savedir + self.sub_dir_str
         # cropped & centered PSF
         if self.save_txt_only==False:
-            fits.PrimaryHDU(data=self.ctrd, \
-                    header=self.scihdr).writeto(self.savedir+\
-                    self.sub_dir_str+"/centered_{0}.fits".format(slc), \
-                    overwrite=True)
+            self.write_image(self.ctrd,
+                    outdir+"/centered_{0}.fits".format(slc), \
+                    header=self.scihdr)
 
             model, modelhdu = nrm.plot_model(fits_true=1)
             # save to fits files
-            fits.PrimaryHDU(data=nrm.residual).writeto(self.savedir+\
-                        self.sub_dir_str+"/residual_{0:02d}.fits".format(slc), \
-                        overwrite=True)
-            modelhdu.writeto(self.savedir+\
-                        self.sub_dir_str+"/modelsolution_{0:02d}.fits".format(slc),\
-                        overwrite=True)
+            self.write_image(nrm.residual,
+                        outdir+"/residual_{0:02d}.fits".format(slc))
+            self.write_image(modelhdu.data,
+                        outdir+"/modelsolution_{0:02d}.fits".format(slc),\
+                        header=modelhdu.header)
         else:
             print("NOT SAVING ANY FITS FILES. SET save_txt_only=False TO SAVE.")
 
         # default save to text files
-        np.savetxt(self.savedir+self.sub_dir_str+\
-                   "/solutions_{0:02d}.txt".format(slc), nrm.soln)
-        np.savetxt(self.savedir+self.sub_dir_str+\
-                   "/phases_{0:02d}.txt".format(slc), nrm.fringephase)
-        np.savetxt(self.savedir+self.sub_dir_str+\
-                   "/amplitudes_{0:02d}.txt".format(slc), nrm.fringeamp)
-        np.savetxt(self.savedir+self.sub_dir_str+\
-                   "/CPs_{0:02d}.txt".format(slc), nrm.redundant_cps)
-        np.savetxt(self.savedir+self.sub_dir_str+\
-                   "/CAs_{0:02d}.txt".format(slc), nrm.redundant_cas)
+        np.savetxt(outdir+"/solutions_{0:02d}.txt".format(slc), nrm.soln)
+        np.savetxt(outdir+"/phases_{0:02d}.txt".format(slc), nrm.fringephase)
+        np.savetxt(outdir+"/amplitudes_{0:02d}.txt".format(slc), nrm.fringeamp)
+        np.savetxt(outdir+"/CPs_{0:02d}.txt".format(slc), nrm.redundant_cps)
+        np.savetxt(outdir+"/CAs_{0:02d}.txt".format(slc), nrm.redundant_cas)
 
         # optional save outputs
         if self.verbose_save:
-            np.savetxt(self.savedir+self.sub_dir_str+\
-                       "/condition_{0:02d}.txt".format(slc), nrm.cond)
-            np.savetxt(self.savedir+self.sub_dir_str+\
-                       "/flux_{0:02d}.txt".format(slc), nrm.flux)
-          
+            np.savetxt(outdir+"/condition_{0:02d}.txt".format(slc), nrm.cond)
+            np.savetxt(outdir+"/flux_{0:02d}.txt".format(slc), nrm.flux)
+
         print(nrm.linfit_result)
-        if nrm.linfit_result is not None:          
+        if nrm.linfit_result is not None:
             # save linearfit results to pickle file
-            myPickleFile = os.path.join(self.savedir+self.sub_dir_str,"linearfit_result_{0:02d}.pkl".format(slc))
+            myPickleFile = os.path.join(outdir,"linearfit_result_{0:02d}.pkl".format(slc))
             with open( myPickleFile , "wb" ) as f:
                 pickle.dump((nrm.linfit_result), f) 
             print("Wrote pickled file  %s" % myPickleFile)
@@ -252,31 +368,74 @@ class FringeFitter:
             plt.savefig(self.savedir+self.sub_dir_str+\
                         "/rotationcorrelation_{0:02d}.png".format(slc))
 
+def _fit_one_file(args):
+    # worker for file-level parallelism in FringeFitter.fit_fringes: fit one
+    # whole file serially and hand its stacked observables back
+    ff, fn, jj = args
+    fit_fringes_parallel({"object": ff, "file": fn, "id": jj}, 0)
+    return ff.observables
+
+_worker_ff = None
+
+def _init_fit_fringes_worker(ff, filename=None):
+    # pool initializer: runs once per worker process
+    global _worker_ff
+    _worker_ff = ff
+    if filename is not None and ff.scidata is None:
+        # re-open the cube as a memmap instead of receiving it through the
+        # pickle; planes are demand-paged as this worker gets to them
+        ff.scidata, ff.scihdr = ff.instrument_data.read_data(filename)
+        if ff.firstfew is not None and ff.scidata.shape[0] > ff.firstfew:
+            ff.scidata = ff.scidata[:ff.firstfew]
+
+def _fit_fringes_worker(slc):
+    return fit_fringes_single_integration({"object": _worker_ff, "slc": slc})
+
 def fit_fringes_parallel(args, threads):
     self = args['object']
     filename = args['file']
     id_tag = args['id']
     self.scidata, self.scihdr = self.instrument_data.read_data(filename)
-
+    if self.firstfew is not None and self.scidata.shape[0] > self.firstfew:
+        # truncate before the copy below: the remaining planes are never
+        # paged in from the memmap.  Keep nwav/wls consistent with the cut.
+        self.scidata = self.scidata[:self.firstfew]
+        self.instrument_data.nwav = self.firstfew
+        self.instrument_data.wls = self.instrument_data.wls[:self.firstfew]
     self.sub_dir_str = self.instrument_data.sub_dir_str
-    try:
-        os.mkdir(self.savedir+self.sub_dir_str)
-    except:
-        pass
-
-    store_dict = [{"object":self, "slc":slc} for slc in \
-                  range(self.instrument_data.nwav)]
+    # one makedirs above the per-integration loop - the workers below only
+    # ever write into an already-existing directory
+    os.makedirs(self.savedir+self.sub_dir_str, exist_ok=True)
 
     if threads>0:
-        pool = Pool(processes=threads)
+        # ship self to each worker once via the pool initializer - the old
+        # per-slice task dicts re-pickled the whole object (cube included)
+        # for every integration.  The cube itself never rides through the
+        # pickle at all: each worker re-opens the FITS file as a memmap, so
+        # the processes share read-only pages through the OS cache and only
+        # the planes a worker actually fits are paged in from disk.
+        scidata, self.scidata = self.scidata, None
+        pool = Pool(processes=threads,
+                    initializer=_init_fit_fringes_worker,
+                    initargs=(self, filename))
         print("Running fit_fringes in parallel with {0} threads".format(threads))
-        pool.map(fit_fringes_single_integration, store_dict)
+        results = pool.map(_fit_fringes_worker,
+                           range(self.instrument_data.nwav))
         pool.close()
         pool.join()
+        self.scidata = scidata
 
     else:
-        for slc in range(self.instrument_data.nwav):
-            fit_fringes_single_integration({"object":self, "slc":slc})
+        results = [fit_fringes_single_integration({"object":self, "slc":slc}) \
+                   for slc in range(self.instrument_data.nwav)]
+
+    # Stack per-slice observables so Calibrate can consume them directly
+    # from memory (kwarg 'observables') without re-reading the text files.
+    results.sort(key=lambda r: r["slc"])
+    self.observables = Observables(
+        *[np.array([r[key] for r in results]) for key in Observables._fields])
+    if self.save_hdf5:
+        self.write_observables_hdf5()
 
 def fit_fringes_single_integration(args):
     self = args["object"]
@@ -291,8 +450,17 @@ def fit_fringes_single_integration(args):
 
     nrm.bandpass = self.instrument_data.wls[slc]
 
+    # pull just this integration out of the (possibly memmapped) cube and
+    # normalize it - native byte order, contiguous - so the centroid, FFT
+    # and model kernels stay on the fast path without byte-swapping, and
+    # without materializing the rest of the cube.
+    data = self.scidata[slc, :, :]
+    data = np.ascontiguousarray(
+        data.astype(self.dtype if self.dtype is not None
+                    else data.dtype.newbyteorder("="), copy=False))
+
     if self.npix == 'default':
-        self.npix = self.scidata[slc,:,:].shape[0]
+        self.npix = data.shape[0]
 
     DBG = False # AS testing gross psf orientatioun while getting to LG++ beta release 2018 09
     if DBG:
@@ -305,13 +473,13 @@ def fit_fringes_single_integration(args):
     # AG 03-2019 -- is above comment still relevant?
     
     if self.instrument_data.arrname=="NIRC2_9NRM":
-        self.ctrd = utils.center_imagepeak(self.scidata[slc, :,:], 
-                        r = (self.npix -1)//2 - 2, cntrimg=False)  
+        self.ctrd = utils.center_imagepeak(data,
+                        r = (self.npix -1)//2 - 2, cntrimg=False)
     elif self.instrument_data.arrname=="gpi_g10s40":
-        self.ctrd = utils.center_imagepeak(self.scidata[slc, :,:], 
-                        r = (self.npix -1)//2 - 2, cntrimg=True)  
+        self.ctrd = utils.center_imagepeak(data,
+                        r = (self.npix -1)//2 - 2, cntrimg=True)
     else:
-        self.ctrd = utils.center_imagepeak(self.scidata[slc, :,:])  
+        self.ctrd = utils.center_imagepeak(data)
         # Old AG LG++ version
         #self.ctrd = utils.center_imagepeak(self.scidata[slc, :,:], 
         #                r = (self.npix -1)//2 - 2)  
@@ -322,12 +490,16 @@ def fit_fringes_single_integration(args):
     # use flipped centroids to update centroid of image for JWST - check parity for GPI, Vizier,...
     # pixel coordinates: - note the flip of [0] and [1] to match DS9 view
     image_center = utils.centerpoint(self.ctrd.shape) + np.array((centroid[1], centroid[0])) # info only, unused
-    print(">>>> nrm_core: centroid offsets {0} from utils.centroid() <<<<".format(centroid))
-    print(">>>> nrm_core: center of light in array coords (ds9) {0} <<<<".format(image_center))
-    nrm.xpos = centroid[1]  # flip 0 and 1 to convert 
+    # accumulate this integration's status lines and flush them in one
+    # stdout write at the end - parallel workers then emit one syscall per
+    # slice instead of serializing half a dozen prints on the tty lock
+    status = [
+        ">>>> nrm_core: centroid offsets {0} from utils.centroid() <<<<".format(centroid),
+        ">>>> nrm_core: center of light in array coords (ds9) {0} <<<<".format(image_center)]
+    nrm.xpos = centroid[1]  # flip 0 and 1 to convert
     nrm.ypos = centroid[0]  # flip 0 and 1
 
-    print(">>>> nrm_core.fit_image(): refslice 6 lines commented out cf LG+ <<<<")
+    status.append(">>>> nrm_core.fit_image(): refslice 6 lines commented out cf LG+ <<<<")
     """ LG++ this fails to run - not sure of what's needed - anand@stsci.edu 2018.02.11
     refslice = self.ctrd.copy()
     if True in np.isnan(refslice):
@@ -340,13 +512,14 @@ def fit_fringes_single_integration(args):
 
     nrm.reference = self.ctrd  # rename bestcenter to bestpsfoffset or similar sometime in the future
     if self.hold_centering == False:
-        print("\n**** nrm.core.fit_fringes_single_integration:    <<HOLD_CENTERING>> False")
+        status.append("\n**** nrm.core.fit_fringes_single_integration:    <<HOLD_CENTERING>> False")
         nrm.bestcenter = nrm.xpos, nrm.ypos  ################ AS try in LG++  Works!
-        print("**** nrm.bestcenter {0}  nrm.xpos {1}  nrm.ypos {2}".format(nrm.bestcenter, nrm.xpos, nrm.ypos))
-        print("**** nrm.core.fit_fringes_single_integration: object.best_center updated with 'centroid' output\n")
+        status.append("**** nrm.bestcenter {0}  nrm.xpos {1}  nrm.ypos {2}".format(nrm.bestcenter, nrm.xpos, nrm.ypos))
+        status.append("**** nrm.core.fit_fringes_single_integration: object.best_center updated with 'centroid' output\n")
     else:
-        print(">>>> nrm_core.fit_image(): hold_centering UNTESTED w/ new utils.centroid().  psf_offset from user... <<<<")
+        status.append(">>>> nrm_core.fit_image(): hold_centering UNTESTED w/ new utils.centroid().  psf_offset from user... <<<<")
         nrm.bestcenter = self.psf_offset # if center already known, python-style offsets from array center are here.
+    sys.stdout.write("\n".join(status) + "\n")
 
     nrm.make_model(fov = self.ctrd.shape[0], bandpass=nrm.bandpass, 
                    over=self.oversample,
@@ -381,7 +554,13 @@ def fit_fringes_single_integration(args):
         plt.show()
     
     self.save_output(slc, nrm)
-    return None
+    # hand the per-slice observables back to the caller so they can be kept
+    # in memory (see FringeFitter.observables) as well as on disk
+    return {"slc": slc,
+            "amps": nrm.fringeamp,
+            "phases": nrm.fringephase,
+            "cps": nrm.redundant_cps,
+            "cas": nrm.redundant_cas}
 
 class Calibrate:
     """
@@ -413,6 +592,23 @@ class Calibrate:
 
     """
 
+    @staticmethod
+    def _observable_files(d):
+        """ One os.scandir() pass over an object directory instead of three
+            os.listdir() filter passes.  Returns sorted (cp, amp, pha) file
+            name lists so slice qq of each list belongs to the same
+            integration. """
+        cpfiles, ampfiles, phafiles = [], [], []
+        with os.scandir(d) as it:
+            for entry in it:
+                if "CPs" in entry.name:
+                    cpfiles.append(entry.name)
+                elif "amplitudes" in entry.name:
+                    ampfiles.append(entry.name)
+                elif "phase" in entry.name:
+                    phafiles.append(entry.name)
+        return sorted(cpfiles), sorted(ampfiles), sorted(phafiles)
+
     def __init__(self, objpaths, instrument_data, savedir=None, extra_dimension=None, **kwargs):
         """
         Initilize the class
@@ -465,6 +661,16 @@ class Calibrate:
             self.vflag=kwargs['vflag']
         else:
             self.vflag=0.0
+
+        # Optional in-memory data path: a sequence of per-object Observables
+        # tuples (target first, then calibrators) as stacked by
+        # FringeFitter.observables - fields amps, phases, cps, each shaped
+        # (nexps, nbl or ncp).  When given, the per-exposure text files are
+        # not re-read from objpaths.
+        if "observables" in kwargs.keys():
+            observables = kwargs["observables"]
+        else:
+            observables = None
     
         #if no savedir specified, default is current working directory
         if savedir ==None:
@@ -479,10 +685,11 @@ class Calibrate:
         self.savedir = savedir
 
         # number of calibrators being used:
-        self.ncals = len(objpaths) - 1 # number of calibrators, if zero, set to 1
+        nsets = len(objpaths) if observables is None else len(observables)
+        self.ncals = nsets - 1 # number of calibrators, if zero, set to 1
         if self.ncals==0:# No calibrators given
             self.ncals = 1 # to avoid empty arrays
-        self.nobjs = len(objpaths) # number of total objects
+        self.nobjs = nsets # number of total objects
 
         self.N = len(instrument_data.mask.ctrs)
         self.nbl = int(self.N*(self.N-1)/2)
@@ -554,15 +761,17 @@ class Calibrate:
                 expflag=[]
                 for qq in range(nexps):
                     # nwav files
-                    cpfiles = [f for f in os.listdir(objpaths[ii]+exps[qq]) if "CPs" in f] 
+                    # build the exposure directory string once, not three
+                    # times per slice
+                    expdir = objpaths[ii]+exps[qq]
+                    cpfiles, ampfiles, phafiles = \
+                        self._observable_files(expdir)
                     print(cpfiles)
-                    ampfiles = [f for f in os.listdir(objpaths[ii]+exps[qq]) \
-                                if "amplitudes" in f]
-                    phafiles = [f for f in os.listdir(objpaths[ii]+exps[qq]) if "phase" in f] 
+                    expdir = expdir + "/"
                     for slc in range(len(cpfiles)):
-                        amp[slc, qq,:] = np.loadtxt(objpaths[ii]+exps[qq]+"/"+ampfiles[slc])
-                        cps[slc, qq,:] = np.loadtxt(objpaths[ii]+exps[qq]+"/"+cpfiles[slc])
-                        pha[slc, qq,:] = np.loadtxt(objpaths[ii]+exps[qq]+"/"+phafiles[slc])
+                        amp[slc, qq,:] = np.loadtxt(expdir+ampfiles[slc])
+                        cps[slc, qq,:] = np.loadtxt(expdir+cpfiles[slc])
+                        pha[slc, qq,:] = np.loadtxt(expdir+phafiles[slc])
                     # 10/14/2016 -- flag the exposure if we get amplitudes > 1
                     # Also flag the exposure if vflag is set, to reject fraction indicated
                     if True in (amp[:,qq,:]>1):
@@ -610,25 +819,38 @@ class Calibrate:
             print("else")
             for ii in range(self.nobjs):
 
-                cpfiles = [f for f in os.listdir(objpaths[ii]) if "CPs" in f] 
-                ampfiles = [f for f in os.listdir(objpaths[ii]) if "amplitudes" in f]
-                phafiles = [f for f in os.listdir(objpaths[ii]) if "phase" in f]
-                nexps = len(cpfiles)
-                print("nexp: "+str(nexps))
-
-                amp = np.zeros((nexps, self.nbl))
-                pha = np.zeros((nexps, self.nbl))
-                cps = np.zeros((nexps, self.ncp))
-                print(nexps)
-                expflag=[]
-                for qq in range(nexps):
-                    amp[qq,:] = np.loadtxt(objpaths[ii]+"/"+ampfiles[qq])
-                    if True in (amp[qq,:]>1):
-                        print('amp > 1 for {}'.format(ampfiles[qq]))
-                        expflag.append(qq)
-                    print(cpfiles[qq])
-                    pha[qq,:] = np.loadtxt(objpaths[ii]+"/"+phafiles[qq])
-                    cps[qq,:] = np.loadtxt(objpaths[ii]+"/"+cpfiles[qq])
+                if observables is not None:
+                    # take the arrays straight from memory - no directory
+                    # walk, no per-exposure text parsing
+                    amp = np.asarray(observables[ii].amps)
+                    pha = np.asarray(observables[ii].phases)
+                    cps = np.asarray(observables[ii].cps)
+                    nexps = amp.shape[0]
+                    print("nexp: "+str(nexps))
+                    expflag=[]
+                    for qq in range(nexps):
+                        if True in (amp[qq,:]>1):
+                            print('amp > 1 for exposure {}'.format(qq))
+                            expflag.append(qq)
+                else:
+                    cpfiles, ampfiles, phafiles = self._observable_files(objpaths[ii])
+                    nexps = len(cpfiles)
+                    print("nexp: "+str(nexps))
+
+                    amp = np.zeros((nexps, self.nbl))
+                    pha = np.zeros((nexps, self.nbl))
+                    cps = np.zeros((nexps, self.ncp))
+                    print(nexps)
+                    expflag=[]
+                    objdir = objpaths[ii]+"/"
+                    for qq in range(nexps):
+                        amp[qq,:] = np.loadtxt(objdir+ampfiles[qq])
+                        if True in (amp[qq,:]>1):
+                            print('amp > 1 for {}'.format(ampfiles[qq]))
+                            expflag.append(qq)
+                        print(cpfiles[qq])
+                        pha[qq,:] = np.loadtxt(objdir+phafiles[qq])
+                        cps[qq,:] = np.loadtxt(objdir+cpfiles[qq])
 
                 # Covariance 06/27/2017
                 if ii == 0:
@@ -712,13 +934,26 @@ class Calibrate:
 
         print('nexp after mask {:d}'.format(nexp))
 
-        meancp = np.ma.masked_array(cps, mask=cpmask).mean(axis=0)
-        meanv2 = np.ma.masked_array(amps, mask=blmask).mean(axis=0)**2
-        meanpha = np.ma.masked_array(pha, mask=blmask).mean(axis=0)**2
+        if expflag is None and _mean_over_exposures is not None:
+            # no exposures masked: run the compiled one-pass reductions
+            cps = np.ascontiguousarray(cps, dtype=np.float64)
+            amps = np.ascontiguousarray(amps, dtype=np.float64)
+            pha = np.ascontiguousarray(pha, dtype=np.float64)
+            sqrtnexp = np.sqrt(nexp)
+            meancp = _mean_over_exposures(cps)
+            meanv2 = _mean_over_exposures(amps)**2
+            meanpha = _mean_over_exposures(pha)**2
+            errcp = np.sqrt(_moment2_over_exposures(cps))/sqrtnexp
+            errv2 = np.sqrt(_moment2_over_exposures(amps**2))/sqrtnexp
+            errpha = np.sqrt(_moment2_over_exposures(pha))/sqrtnexp
+        else:
+            meancp = np.ma.masked_array(cps, mask=cpmask).mean(axis=0)
+            meanv2 = np.ma.masked_array(amps, mask=blmask).mean(axis=0)**2
+            meanpha = np.ma.masked_array(pha, mask=blmask).mean(axis=0)**2
 
-        errcp = np.sqrt(mstats.moment(np.ma.masked_array(cps, mask=cpmask), moment=2, axis=0))/np.sqrt(nexp)
-        errv2 = np.sqrt(mstats.moment(np.ma.masked_array(amps**2, mask=blmask), moment=2, axis=0))/np.sqrt(nexp)
-        errpha = np.sqrt(mstats.moment(np.ma.masked_array(pha, mask=blmask), moment=2, axis=0))/np.sqrt(nexp)
+            errcp = np.sqrt(mstats.moment(np.ma.masked_array(cps, mask=cpmask), moment=2, axis=0))/np.sqrt(nexp)
+            errv2 = np.sqrt(mstats.moment(np.ma.masked_array(amps**2, mask=blmask), moment=2, axis=0))/np.sqrt(nexp)
+            errpha = np.sqrt(mstats.moment(np.ma.masked_array(pha, mask=blmask), moment=2, axis=0))/np.sqrt(nexp)
 
         # Set cutoff accd to Kraus 2008 - 2/3 of median
         errcp[errcp < (2/3.0)*np.median(errcp)] =(2/3.0)*np.median(errcp) 
@@ -799,24 +1034,30 @@ class Calibrate:
             self.clip_wls = None
             clippedcov = self.cov
 
-        if not hasattr(self.instrument_data, "parang_range"):
-            self.instrument_data.parang_range = 0.0
-        if not hasattr(self.instrument_data, "avparang"):
-            self.instrument_data.avparang = 0.0
+        # pull the instrument object and the active filter's scalars into
+        # locals once - the per-filter dicts were re-indexed at every use
+        # below, and each self.instrument_data access is an attribute chain
+        instr = self.instrument_data
+        if not hasattr(instr, "parang_range"):
+            instr.parang_range = 0.0
+        if not hasattr(instr, "avparang"):
+            instr.avparang = 0.0
+        lam_c = instr.lam_c[instr.filt]
+        lam_w = instr.lam_w[instr.filt]
         self.obskeywords = {
                 'path':self.savedir+"/",
-                'year':self.instrument_data.year, 
-                'month':self.instrument_data.month,
-                'day':self.instrument_data.day,
-                'TEL':self.instrument_data.telname,\
-                'instrument':self.instrument_data.instrument, 
-                'arrname':self.instrument_data.arrname, 
-                'object':self.instrument_data.objname,
-                'RA':self.instrument_data.ra, 
-                'DEC':self.instrument_data.dec, \
-                'PARANG':self.instrument_data.avparang, 
-                'PARANGRANGE':self.instrument_data.parang_range,
-                'PA':self.instrument_data.pa, 
+                'year':instr.year,
+                'month':instr.month,
+                'day':instr.day,
+                'TEL':instr.telname,\
+                'instrument':instr.instrument,
+                'arrname':instr.arrname,
+                'object':instr.objname,
+                'RA':instr.ra,
+                'DEC':instr.dec, \
+                'PARANG':instr.avparang,
+                'PARANGRANGE':instr.parang_range,
+                'PA':instr.pa,
                 'phaseceil':self.phaseceil,
                 'covariance':clippedcov}
 
@@ -824,29 +1065,29 @@ class Calibrate:
         "\tv2",self.v2_calibrated.shape, "v2err",self.v2_err_calibrated.shape, '\n',
         "\tcps",self.cp_calibrated_deg.shape, "cperr",self.cp_err_calibrated_deg.shape, '\n',
         "\tpha",self.pha_calibrated_deg.shape, "phaerr",self.pha_err_calibrated_deg.shape,  '\n',
-        "\twave",self.instrument_data.lam_c[self.instrument_data.filt], '\n',
-        "\twave",self.instrument_data.lam_w[self.instrument_data.filt], '\n',
-        "\tnwave",self.instrument_data.nwav, '\n',
-        "\thole_size",self.instrument_data.mask.hdia, '\n',
-        "\tnholes",self.instrument_data.mask.ctrs.shape[0], '\n',
+        "\twave",lam_c, '\n',
+        "\twave",lam_w, '\n',
+        "\tnwave",instr.nwav, '\n',
+        "\thole_size",instr.mask.hdia, '\n',
+        "\tnholes",instr.mask.ctrs.shape[0], '\n',
         )
-        print("len(ctrs):", len(self.instrument_data.mask.ctrs))
+        print("len(ctrs):", len(instr.mask.ctrs))
         for k in self.obskeywords.keys():
             print("\t\t%s"%k, self.obskeywords[k])
 
-        print("\t mask.ctrs is of type: ", type(self.instrument_data.mask.ctrs))
-        #oif = OIfits(self.instrument_data.mask, self.obskeywords)
+        print("\t mask.ctrs is of type: ", type(instr.mask.ctrs))
+        #oif = OIfits(instr.mask, self.obskeywords)
         glue_js_oifits.write(
                     obskeywords=self.obskeywords,
                     v2=self.v2_calibrated[0,:], v2err=self.v2_err_calibrated[0,:],
                     cps=self.cp_calibrated_deg[0,:], cperr=self.cp_err_calibrated_deg[0,:],
-                    pha=self.pha_calibrated_deg[0,:], phaerr=self.pha_err_calibrated_deg[0,:], 
-                    wave=self.instrument_data.lam_c[self.instrument_data.filt],
-                    bandwidth=self.instrument_data.lam_w[self.instrument_data.filt],
-                    nwave=self.instrument_data.nwav,
-                    hole_size=self.instrument_data.mask.hdia,
-                    nholes=self.instrument_data.mask.ctrs.shape[0],
-                    ctrs = self.instrument_data.mask.ctrs ,
+                    pha=self.pha_calibrated_deg[0,:], phaerr=self.pha_err_calibrated_deg[0,:],
+                    wave=lam_c,
+                    bandwidth=lam_w,
+                    nwave=instr.nwav,
+                    hole_size=instr.mask.hdia,
+                    nholes=instr.mask.ctrs.shape[0],
+                    ctrs = instr.mask.ctrs ,
                     )
         """ 
         interface_oifits_js_writ(v2=self.v2_calibrated, v2err=self.v2_err_calibrated, \